@@ -263,13 +263,12 @@ def create_utilities():
     for readme in glob.glob(paths.utilities("*", "README")):
         os.rename(readme, readme + ".txt")
     # Set up manifests for all utilities
+    exe_name = paths.HOST_OS + "_exe"
     for util in component.UTILITIES:
-        fixup_manifest(
-            paths.utilities(util.name, "manifest.json"), util, **_exes_for(util)
-        )
+        manifest_file = paths.utilities(util.name, "manifest.json")
+        fixup_manifest(manifest_file, util, **_exes_for(util))
         if paths.HOST_OS != "win":
-            exe_name = paths.HOST_OS + "_exe"
-            with open(paths.utilities(util.name, "manifest.json")) as f:
+            with open(manifest_file) as f:
                 manifest = json.load(f)
                 if exe_name in manifest:
                     exe = manifest[exe_name]
@@ -382,7 +381,7 @@ def build_lnp_dirs():
 
     # Create new PyLNP.json
     with open(paths.base("PyLNP-json.yml")) as f:
-        pylnp_conf = yaml.load(f, Loader=yaml.Loader)
+        pylnp_conf = yaml.load(f, Loader=paths.SAFE_LOADER)
     pylnp_conf["updates"]["packVersion"] = paths.pack_ver()
     pylnp_conf["updates"]["dffdID"] = paths.CONFIG["dffdID"]
     if not paths.ARGS.stable:
@@ -14,7 +14,6 @@ import os
 import re
 import time
 
-import requests
 import yaml
 
 from . import metadata_api, paths
@@ -33,8 +32,7 @@ def report():
 
 def raw_dl(url, path):
     """Save url contents to a file."""
-    req = requests.get(url)
-    req.raise_for_status()
+    req = metadata_api.get_ok(url)
     with open(path, "wb") as f:
         f.write(b"".join(req.iter_content(1024)))
 
@@ -53,11 +51,17 @@ def download(c):
 
 
 def download_files():
-    """Download files which are in config.yml, but not saved in components."""
+    """Start downloading files which are in config.yml, but not saved in components.
+
+    Extraction waits on the futures in DOWNLOADS, so that each component can
+    be extracted as soon as its file arrives.
+    """
     if not os.path.isdir(paths.components()):
         os.mkdir(paths.components())
-    with concurrent.futures.ThreadPoolExecutor(10) as executor:
-        executor.map(download, ALL.values(), timeout=180)
+    executor = concurrent.futures.ThreadPoolExecutor(10)
+    for c in ALL.values():
+        DOWNLOADS[c.name] = executor.submit(download, c)
+    executor.shutdown(wait=False)
 
 
 _template = collections.namedtuple(
@@ -140,7 +144,7 @@ def get_globals():
     """Return the dict and lists for globals ALL, FILES, GRAPHICS, and UTILITIES."""
     # get config objects for components
     with open("components.yml") as ymlf:
-        config = yaml.safe_load(ymlf)
+        config = yaml.load(ymlf, Loader=paths.SAFE_LOADER)
         config["files"]["Dwarf Fortress"] = {
             "ident": "Dwarf Fortress",
             "host": "special",
@@ -191,6 +195,7 @@ def main():
 
 if __name__ != "__main__":
     ALL, FILES, GRAPHICS, UTILITIES = get_globals()
+    DOWNLOADS = {}
 
     # I forgot to update this last time... upload a new file to get ID, edit
     # config and this assertion, and then rebuild pack for correct forum message.
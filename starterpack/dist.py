@@ -4,6 +4,7 @@
 import hashlib
 import json
 import os
+import pathlib
 import re
 import shutil
 import zipfile
@@ -17,12 +18,12 @@ def get_contents(kwargs):
     Removes lines for missing components and
     warns if existing components are not listed.
     """
-    with open(paths.base("contents.txt")) as f:
-        template = "".join(
-            l
-            for l in f.readlines()
-            if "{" not in l or re.findall(r"{(.*?)}", l)[0] in kwargs
-        )
+    lines = pathlib.Path(paths.base("contents.txt")).read_text().splitlines(True)
+    template = "".join(
+        line
+        for line in lines
+        if "{" not in line or re.findall(r"{(.*?)}", line)[0] in kwargs
+    )
     template = template.replace("\n\n\n\n", "\n\n")
     for item in set(re.findall(r"{(.*?)}", template)) - set(kwargs):
         print("WARNING: " + item + " not listed in base/docs/contents.txt")
@@ -47,21 +48,41 @@ def create_about():
     kwargs = {c.name: link(c, dash="") for c in component.FILES}
     kwargs["graphics"] = "\n".join(link(c, False) for c in component.GRAPHICS)
     kwargs["utilities"] = "\n".join(link(c) for c in component.UTILITIES)
-    with open(paths.base("changelog.txt")) as f:
-        kwargs["changelogs"] = "\n\n".join(f.read().split("\n\n")[:5])
-    with open(paths.lnp("about", "contents.txt"), "w") as f:
-        f.write(get_contents(kwargs))
+    changelog = pathlib.Path(paths.base("changelog.txt")).read_text()
+    kwargs["changelogs"] = "\n\n".join(changelog.split("\n\n")[:5])
+    pathlib.Path(paths.lnp("about", "contents.txt")).write_text(get_contents(kwargs))
+
+
+def _walk(top):
+    """Yield (dirpath, dirpaths, filepaths) for top and every subdir."""
+    files, subdirs = [], []
+    with os.scandir(top) as entries:
+        for entry in entries:
+            # Like os.walk, skip symlinks to dirs rather than following them
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif not entry.is_dir():
+                files.append(entry.path)
+    yield top, subdirs, files
+    for subdir in subdirs:
+        yield from _walk(subdir)
 
 
 def zip_pack():
     """Compress the build dir to a zipped pack."""
     os.makedirs(paths.dist(), exist_ok=True)
-    with zipfile.ZipFile(paths.zipped(), "w", zipfile.ZIP_DEFLATED) as zf:
-        for dirname, _, files in os.walk(paths.build()):
-            zf.write(dirname, os.path.relpath(dirname, paths.build()))
-            for filename in files:
-                fname = os.path.join(dirname, filename)
-                zf.write(fname, os.path.relpath(fname, paths.build()))
+    # Every path from _walk starts with the build dir, so slice it off
+    root = paths.build()
+    root_len = len(root) + 1
+    with zipfile.ZipFile(
+        paths.zipped(), "w", zipfile.ZIP_DEFLATED, compresslevel=paths.ARGS.zip_level
+    ) as zf:
+        for dirname, subdirs, files in _walk(root):
+            # Directories are implied by their contents; only store empty ones
+            if dirname != root and not (subdirs or files):
+                zf.write(dirname, dirname[root_len:])
+            for fname in files:
+                zf.write(fname, fname[root_len:])
 
 
 def release_docs():
@@ -70,8 +91,8 @@ def release_docs():
         shutil.copy(paths.lnp("about", "contents.txt"), paths.dist())
     with open(paths.lnp("PyLNP.json")) as config:
         dffd_id = json.load(config)["updates"]["dffdID"]
-    with open(paths.lnp("about", "changelog.txt")) as f:
-        changes = f.read().split("\n\n")[0]
+    changes = pathlib.Path(paths.lnp("about", "changelog.txt")).read_text()
+    changes = changes.split("\n\n")[0]
     sha256 = hashlib.sha256()
     with open(paths.zipped(), "rb") as f:
         for chunk in iter(lambda: f.read(8192), b""):
@@ -87,10 +108,10 @@ def release_docs():
     with open(paths.dist("forum_post.txt"), "w") as f:
         f.write(paths.CONFIG.get(key, "").replace("_\n", "\n").format(**post_kwargs))
         if not paths.ARGS.stable:
-            with open(paths.lnp("about", "contents.txt")) as contents:
-                f.write("\n[spoiler=Full contents]\n")
-                f.write(contents.read())
-                f.write("\n[/spoiler]")
+            contents = pathlib.Path(paths.lnp("about", "contents.txt")).read_text()
+            f.write("\n[spoiler=Full contents]\n")
+            f.write(contents)
+            f.write("\n[/spoiler]")
 
 
 def main():
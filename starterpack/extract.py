@@ -4,28 +4,148 @@ This module is about as generic as it can usefully be, pushing the special
 cases back into build.py
 """
 
+import collections
 import concurrent.futures
+import functools
+import heapq
+import io
 import os
 import shutil
+import struct
 import subprocess
 import sys
 import tarfile
 import tempfile
-import time
+import threading
 import zipfile
-from distutils.dir_util import copy_tree
+import zlib
 
 from . import component, paths
 
+# Optional dependencies for less common archive formats
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+try:
+    import rarfile
+except ImportError:
+    rarfile = None
 
-def _copyfile(src, dest):
+# Archives are extracted in parallel, and each job copies or unzips files
+# in parallel threads - so split the available threads between the two.
+# Work is mostly zlib and disk I/O, which release the GIL.
+CPUS = os.cpu_count() or 1
+JOBS = min(16, 2 * CPUS)
+JOB_THREADS = max(2, 2 * CPUS // JOBS)
+# Read and copy buffer size; the default 8-16 KiB means far more syscalls
+BUFSIZE = 1 << 20
+# Smaller zip entries are read whole and written in a single call
+SMALL_FILE = 1 << 18
+# Archive types we can tell by extension, without sniffing the contents
+TAR_EXTS = (".tar.bz2", ".tar.gz", ".tar.xz", ".tgz")
+OTHER_EXTS = (".7z", ".7zip", ".dmg", ".lua", ".rar")
+# Use tarfile's safe extraction filter, where this Python has it (3.12+,
+# and security releases back to 3.8) - which also avoids a DeprecationWarning
+TAR_FILTER = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+# Extraction jobs run on threads, so keep their progress lines whole
+PRINT_LOCK = threading.Lock()
+
+
+def _copyfile(src, dest, make_dir=True):
     """Copy the source file path or object to the dest path, creating dirs."""
-    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if make_dir:
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
     if isinstance(src, str):
         shutil.copy2(src, dest)
     else:
         with open(dest, "wb") as out:
-            shutil.copyfileobj(src, out)
+            shutil.copyfileobj(src, out, BUFSIZE)
+
+
+def _link_or_copy(src, dest):
+    """Hard-link src to dest if possible, or fall back to copying it."""
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+def copy_tree(src, dest, link=False):
+    """Copy the tree at src into dest, merging with any existing contents.
+
+    If link is true, files are hard-linked where possible - only safe when
+    src is about to be discarded, as later writes would change both copies.
+    Symlinks are followed, so they overwrite any existing file at dest.
+    """
+    # copy2 uses the zero-copy os.sendfile fast path where available
+    copy = _link_or_copy if link else shutil.copy2
+    with concurrent.futures.ThreadPoolExecutor(JOB_THREADS) as pool:
+        futures = []
+
+        def copy_async(src, dest):
+            futures.append(pool.submit(copy, src, dest))
+
+        shutil.copytree(src, dest, copy_function=copy_async, dirs_exist_ok=True)
+        for fut in futures:
+            fut.result()
+
+
+def _common_prefix(names):
+    """Return the leading dirs shared by all archive member names, if any.
+
+    Like `posixpath.commonpath` but keeps the trailing slash, so the prefix
+    can be sliced off each name instead of calling `posixpath.relpath`.
+    A single file is never stripped of its dirs.
+    """
+    if len(names) < 2:
+        return ""
+    head, sep, _ = os.path.commonprefix(names).rpartition("/")
+    return head + sep
+
+
+def _unsafe_name(name):
+    """Return True if an archive member name is absolute or goes up a dir."""
+    return name.startswith("/") or ".." in name.split("/")
+
+
+def _stored_bytes(data, info):
+    """Return a view of the bytes of an uncompressed member, or None.
+
+    Also None if the CRC doesn't match, so `ZipFile` reports the error.
+    """
+    start = info.header_offset
+    if (
+        info.compress_type != zipfile.ZIP_STORED
+        or info.flag_bits & 0x1  # encrypted
+        or not data.startswith(zipfile.stringFileHeader, start)
+    ):
+        return None
+    # The local header has its own name and extra field lengths
+    name_len, extra_len = struct.unpack_from("<HH", data, start + 26)
+    start += zipfile.sizeFileHeader + name_len + extra_len
+    end = start + info.compress_size
+    view = memoryview(data)[start:end]
+    if zlib.crc32(view) != info.CRC:
+        return None
+    return view
+
+
+def _unzip_batch(data, jobs):
+    """Extract (ZipInfo, outpath) pairs, with a ZipFile for this thread only."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for info, out in jobs:
+            stored = _stored_bytes(data, info)
+            if stored is not None:
+                # Straight from the archive in memory; nothing to inflate
+                with open(out, "wb") as f:
+                    f.write(stored)
+            elif info.file_size < SMALL_FILE:
+                with open(out, "wb") as f:
+                    f.write(zf.read(info))
+            else:
+                with zf.open(info) as src:
+                    _copyfile(src, out, make_dir=False)
 
 
 def unzip_to(filename, target_dir=None, path_pairs=None):
@@ -39,40 +159,78 @@ def unzip_to(filename, target_dir=None, path_pairs=None):
     """
     assert bool(target_dir) != bool(path_pairs), "Choose one unzip mode!"
     out = target_dir or os.path.commonpath([p[1] for p in path_pairs])
-    print(
-        "{:28}  ->  {}".format(
-            os.path.basename(filename)[:28], os.path.relpath(out, paths.build())
+    with PRINT_LOCK:
+        print(
+            "{:28}  ->  {}".format(
+                os.path.basename(filename)[:28], os.path.relpath(out, paths.build())
+            )
         )
-    )
 
-    if (
-        path_pairs is not None
-        or filename[-4:] in (".exe", ".jar")
-        or not zipfile.is_zipfile(filename)
-    ):
-        # ensures consistent handling for path_pairs
+    if filename[-4:] in (".exe", ".jar") or filename.endswith(TAR_EXTS + OTHER_EXTS):
         return nonzip_extract(filename, target_dir, path_pairs)
-    # More complex, but faster for zips to do it this way
-    with zipfile.ZipFile(filename) as zf:
-        files = dict(
-            a
-            for a in zip(zf.namelist(), zf.infolist())
-            if not (a[0].endswith("/") or "__MACOSX/" in a[0])
-        )
-        prefix = os.path.commonpath(list(files)) if len(files) > 1 else ""
-        for name in files:
-            out = os.path.join(target_dir, os.path.relpath(name, prefix))
-            _copyfile(zf.open(files[name]), out)
+    # More complex, but faster for zips to do it this way.  Read the archive
+    # once; each BytesIO shares this buffer rather than copying it.
+    with open(filename, "rb") as f:
+        data = f.read()
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile:
+        # Whatever the extension says, this isn't a zip
+        return nonzip_extract(filename, target_dir, path_pairs)
+    with zf:
+        infos = [
+            info
+            for info in zf.infolist()
+            if not (info.is_dir() or "__MACOSX/" in info.filename)
+        ]
+        if any(_unsafe_name(info.filename) for info in infos):
+            # ZipFile.extract sanitises such names; the fallback uses it
+            return nonzip_extract(filename, target_dir, path_pairs)
+        prefix = _common_prefix([info.filename for info in infos])
+        cut = len(prefix)
+        if path_pairs is None:
+            # Names are checked above, so can be appended to the target dir
+            root = os.path.join(target_dir, "")
+            jobs = [(info, root + info.filename[cut:]) for info in infos]
+        else:
+            jobs = []
+            for inpath, outpath in path_pairs:
+                if outpath.endswith("/"):
+                    outpath += os.path.basename(inpath)
+                try:
+                    # Uses the name index zipfile already built
+                    jobs.append((zf.getinfo(prefix + inpath), outpath))
+                except KeyError:
+                    raise FileNotFoundError(
+                        'WARNING:  "{}" not found in "{}"'.format(
+                            inpath, os.path.basename(filename)
+                        )
+                    ) from None
+    # Create each directory once, rather than once per file
+    for d in {os.path.dirname(out) for _, out in jobs}:
+        os.makedirs(d, exist_ok=True)
+    # Contiguous batches in archive order, so each thread reads through its
+    # part of the zip (the central directory need not list members in order)
+    jobs.sort(key=lambda job: job[0].header_offset)
+    n = min(JOB_THREADS, len(jobs)) or 1
+    bounds = [i * len(jobs) // n for i in range(n + 1)]
+    batches = [jobs[a:b] for a, b in zip(bounds, bounds[1:])]
+    if n == 1:
+        # e.g. single-file utilities; not worth starting a thread
+        return _unzip_batch(data, jobs)
+    with concurrent.futures.ThreadPoolExecutor(n) as pool:
+        # Consume the results to re-raise any exception from a worker
+        list(pool.map(functools.partial(_unzip_batch, data), batches))
 
 
 def nonzip_extract(filename, target_dir=None, path_pairs=None):
     """Equivalent to `unzip_to`, for non-zip archives.
 
-    Extract to tempdir, copy files to destination/path_pairs, remove tempdir.
+    Tarballs and most .rar archives are handled by `untar_to` and
+    `unrar_to`.  Anything else is extracted to a tempdir, moved or copied
+    to destination/path_pairs, and the tempdir removed.
 
-    Involves a lot of shelling out, as Python's `tarfile` cannot open
-    the .tar.bz2 archived DF releases (complicated header issue).
-    OSX disk images (.dmg) are also unsupported by Python.
+    OSX disk images (.dmg) are unsupported by Python.
     """
     if (
         (filename.endswith(".exe") and paths.HOST_OS == "win")
@@ -81,24 +239,37 @@ def nonzip_extract(filename, target_dir=None, path_pairs=None):
     ):
         _copyfile(filename, os.path.join(target_dir, os.path.basename(filename)))
         return True
+    if is_tarball(filename) and untar_to(filename, target_dir, path_pairs):
+        return True
+    if filename.endswith(".rar") and unrar_to(filename, target_dir, path_pairs):
+        return True
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    # Stage inside the build dir, so files can be renamed or linked into place
+    os.makedirs(paths.build(), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=paths.build()) as tmpdir:
         if not unpack_anything(filename, tmpdir):
             raise RuntimeError("Could not extract file {}".format(filename))
         shutil.rmtree(os.path.join(tmpdir, "__MACOSX"), ignore_errors=True)
         # Copy from tempdir to destination
-        files = [
-            os.path.join(root, f) for root, _, files in os.walk(tmpdir) for f in files
-        ]
-        prefix = os.path.commonpath(files) if len(files) > 1 else ""
-        if target_dir:
-            copy_tree(os.path.join(tmpdir, prefix), target_dir)
+        top = _least_nested(tmpdir)
+        if target_dir and os.path.isfile(top):
+            # Move rather than copy, as the tempdir is about to be removed
+            out = os.path.join(target_dir, os.path.relpath(top, tmpdir))
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            shutil.move(top, out)
+        elif target_dir and top != tmpdir and not os.path.exists(target_dir):
+            # Nothing installed there yet, so just rename the tree into place
+            os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+            os.rename(top, target_dir)
+        elif target_dir:
+            copy_tree(top, target_dir, link=True)
         else:
+            prefix = tmpdir if os.path.isfile(top) else top
             for inpath, outpath in path_pairs:
                 if outpath.endswith("/"):
                     outpath += os.path.basename(inpath)
-                if os.path.isfile(os.path.join(tmpdir, prefix, inpath)):
-                    _copyfile(os.path.join(tmpdir, prefix, inpath), outpath)
+                if os.path.isfile(os.path.join(prefix, inpath)):
+                    _copyfile(os.path.join(prefix, inpath), outpath)
                 else:
                     raise FileNotFoundError(
                         'WARNING:  "{}" not found in "{}"'.format(
@@ -108,104 +279,280 @@ def nonzip_extract(filename, target_dir=None, path_pairs=None):
     return True
 
 
+def _least_nested(root):
+    """Return the first dir under root with several entries, like commonpath.
+
+    If the tree holds only one file, return the path to that file instead.
+    """
+    path = root
+    while True:
+        with os.scandir(path) as it:
+            entries = list(it)
+        if len(entries) != 1:
+            return path
+        path = entries[0].path
+        if not entries[0].is_dir():
+            return path
+
+
+def is_zip(filename):
+    """Return True if the file is a zip.
+
+    `unzip_to` only gets here for files that failed to open as a zip, so
+    the content is checked even if the name ends with ".zip".
+    """
+    if filename.endswith(TAR_EXTS + OTHER_EXTS):
+        return False
+    return zipfile.is_zipfile(filename)
+
+
+def is_tarball(filename):
+    """Return True if the file is a (possibly compressed) tar archive."""
+    if filename.endswith(TAR_EXTS):
+        return True
+    if filename.endswith(OTHER_EXTS):
+        return False
+    return tarfile.is_tarfile(filename)
+
+
+def untar_to(filename, target_dir=None, path_pairs=None):
+    """Equivalent to `unzip_to` for tarballs, decompressing only once.
+
+    The common prefix is only known after reading the whole stream, so
+    members are staged in the build dir and the stripped tree is renamed
+    or linked into place.  In path_pairs mode the whole stream is still
+    read, but only members which might be wanted are staged, and the
+    pairs are copied out of the staging dir afterwards.
+
+    Returns False without extracting anything if a member would escape
+    the destination, so the caller can fall back to the tempdir method.
+    """
+    pairs = []
+    for inpath, outpath in path_pairs or []:
+        if outpath.endswith("/"):
+            outpath += os.path.basename(inpath)
+        pairs.append((inpath, outpath))
+    # For path_pairs, only stage members which might be wanted
+    ends = tuple("/" + inpath for inpath, _ in pairs)
+    names = []
+    os.makedirs(paths.build(), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=paths.build()) as stage:
+        # Streaming mode reads linearly through a large buffer
+        with tarfile.open(filename, "r|*", bufsize=BUFSIZE) as tf:
+            for m in tf:
+                if not _tar_wanted(m):
+                    continue
+                if _unsafe_name(m.name):
+                    return False
+                names.append(m.name)
+                if target_dir or ("/" + m.name).endswith(ends):
+                    tf.extract(m, stage, **TAR_FILTER)
+        top = os.path.join(stage, *_common_prefix(names).split("/")[:-1])
+        if target_dir and top != stage and not os.path.exists(target_dir):
+            # Nothing installed there yet, so just rename the tree into place
+            os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+            os.rename(top, target_dir)
+        elif target_dir:
+            copy_tree(top, target_dir, link=True)
+        for inpath, outpath in pairs:
+            if not os.path.isfile(os.path.join(top, inpath)):
+                raise FileNotFoundError(
+                    'WARNING:  "{}" not found in "{}"'.format(
+                        inpath, os.path.basename(filename)
+                    )
+                )
+            _copyfile(os.path.join(top, inpath), outpath)
+    return True
+
+
+def _tar_wanted(member):
+    """Return True for tar members to extract; i.e. not dirs or OSX junk."""
+    return not member.isdir() and "__MACOSX" not in member.name.split("/")
+
+
+def unrar_to(filename, target_dir=None, path_pairs=None):
+    """Equivalent to `unzip_to` for .rar archives, without a tempdir round-trip.
+
+    Returns False without extracting anything if rarfile is not installed,
+    or if a common prefix must be stripped (which `extractall` can't do).
+    """
+    if rarfile is None:
+        return False
+    with rarfile.RarFile(filename) as rf:
+        infos = [i for i in rf.infolist() if not i.is_dir()]
+        # Ignore OSX junk when looking for the common prefix
+        names = [i.filename for i in infos if "__MACOSX" not in i.filename.split("/")]
+        prefix = _common_prefix(names)
+        if target_dir:
+            if prefix or len(names) != len(infos):
+                return False
+            # One call to the unrar tool for everything, not one per member
+            rf.extractall(target_dir)
+            return True
+        for inpath, outpath in path_pairs:
+            if outpath.endswith("/"):
+                outpath += os.path.basename(inpath)
+            if prefix + inpath not in names:
+                raise FileNotFoundError(
+                    'WARNING:  "{}" not found in "{}"'.format(
+                        inpath, os.path.basename(filename)
+                    )
+                )
+            with rf.open(prefix + inpath) as src:
+                _copyfile(src, outpath)
+    return True
+
+
 def unpack_anything(filename, tmpdir):
     """Extract practically any archive format from src file to dest dir."""
     if filename.endswith(".dmg") and paths.HOST_OS == "osx":
         # TODO:  support .dmg extraction via shell on OSX
         raise NotImplementedError("TODO: mount .dmg, copy contents to tmpdir, unmount")
-    elif zipfile.is_zipfile(filename):
+    elif is_zip(filename):
         # Uses fast version above; handled here for completeness
-        zipfile.ZipFile(filename).extractall(tmpdir)
+        with open(filename, "rb", BUFSIZE) as f:
+            zipfile.ZipFile(f).extractall(tmpdir)
         return True
-    elif any(
-        filename.endswith(".tar." + ext) for ext in ("bz2", "xz", "gz")
-    ) or tarfile.is_tarfile(filename):
-        tarfile.open(filename).extractall(tmpdir)
+    elif is_tarball(filename):
+        with tarfile.open(filename, "r|*", bufsize=BUFSIZE) as tf:
+            tf.extractall(tmpdir, **TAR_FILTER)
         return True
     elif filename.endswith(".rar"):
-        try:
-            import rarfile
-        except ImportError:
+        if rarfile is None:
             print("ERROR: .rar not supported; `pip install rarfile` and retry")
             return False
         rarfile.RarFile(filename).extractall(tmpdir)
         return True
     elif filename.endswith(".7z") or filename.endswith(".7zip"):
+        if py7zr is not None:
+            with py7zr.SevenZipFile(filename, "r") as archive:
+                archive.extractall(tmpdir)
+            return True
         exe = "7z"
         if sys.platform in ("win32", "cygwin"):
             exe = r"C:\Program Files\7-Zip\7z.exe"
             if not os.path.isfile(exe):
                 exe = exe.replace("Program Files", "Program Files (x86)")
-            exe = '"{}"'.format(exe)
-        args = '{} x "{}" -o"{}"'.format(exe, filename, tmpdir)
         try:
-            subprocess.run(args, check=True, stdout=subprocess.DEVNULL)
+            subprocess.run(
+                [exe, "x", filename, "-o" + tmpdir],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
             return True
-        except subprocess.CalledProcessError as e:
+        except (OSError, subprocess.CalledProcessError) as e:
             print("ERROR: failed to extract {}, install 7z".format(filename))
-            print(e.stderr)
+            print(getattr(e, "stderr", e))
             return False
     print("Error: skipping unsupported archive format " + filename)
     return False
 
 
+def extract_df(filename):
+    """Extract DF once, then copy it to the baseline and ASCII graphics dirs."""
+    unzip_to(filename, paths.curr_baseline())
+    # Copy from the baseline, as later components will install into paths.df()
+    for dest in (paths.df(), paths.graphics("ASCII")):
+        copy_tree(paths.curr_baseline(), dest)
+
+
+@functools.lru_cache(maxsize=None)
+def _dest_path(to):
+    """Return the path for an extract_to destination string."""
+    # first part of the string is paths method, remainder is args
+    dest, *details = to.split("/")
+    return getattr(paths, dest)(*details)
+
+
 def extract_comp(pool, comp):
     """Return args with which comp can be sent to the executor."""
+    if comp.name == "Dwarf Fortress":
+        return pool.submit(extract_df, comp.path)
     if ":" not in comp.extract_to:
-        # first part of extract_to is paths method, remainder is args
-        dest, *details = comp.extract_to.split("/")
-        return pool.submit(unzip_to, comp.path, getattr(paths, dest)(*details))
+        return pool.submit(unzip_to, comp.path, _dest_path(comp.extract_to))
     # else using the path_pairs option; extract pairs from string
+    # Note: can add format variables here as needed
+    dfhack_ver = ""
+    if "{DFHACK_VER}" in comp.extract_to:
+        dfhack_ver = component.ALL["DFHack"].version
     pairs = []
     for pair in comp.extract_to.strip().split("\n"):
         src, to = pair.split(":")
-        dest, *details = to.split("/")
-        # Note: can add format variables here as needed
-        if "{DFHACK_VER}" in src:
-            src = src.format(DFHACK_VER=component.ALL["DFHack"].version)
-        pairs.append([src, getattr(paths, dest)(*details)])
+        pairs.append([src.replace("{DFHACK_VER}", dfhack_ver), _dest_path(to)])
     return pool.submit(unzip_to, comp.path, None, pairs)
 
 
 def extract_everything():
     """Extract everything in components.yml, respecting order requirements."""
+    after = collections.defaultdict(list)
+    for c in component.ALL.values():
+        after[c.install_after].append(c.name)
+    depth = {}
 
-    def q_key(comp):
-        """Decide extract priority by pointer-chase depth, filesize in ties."""
-        after = {c.install_after: c.name for c in component.ALL.values()}
-        name, seen = comp.name, []
-        while name in after:
-            seen.append(name)
-            name = after.get(name)
-            if name in seen:
-                raise ValueError(
-                    'Cyclic "install_after" config detected: '
-                    + " -> ".join(seen + [name])
-                )
-        return len(seen), os.path.getsize(comp.path)
-
-    queue = list(component.ALL.values()) + [
-        component.ALL["Dwarf Fortress"]._replace(name=path, extract_to=path)
-        for path in ("curr_baseline", "graphics/ASCII")
-    ]
-    queue.sort(key=q_key, reverse=True)
-    with concurrent.futures.ProcessPoolExecutor(8) as pool:
-        futures = {}
-        while queue:
-            while sum(f.running() for f in futures.values()) < 8:
-                for idx, comp in enumerate(queue):
-                    if comp.extract_to is False:
-                        assert comp.filename.endswith(".ini")
-                        queue.pop(idx)
-                        continue  # for Therapist, handled in build.py
-                    aft = futures.get(comp.install_after)
-                    # Even if it's highest-priority, wait for parent job(s)
-                    if aft is None or aft.done():
-                        futures[comp.name] = extract_comp(pool, queue.pop(idx))
-                        break  # reset index or we might pop the wrong item
+    def chain_depth(name, seen=()):
+        """Return the length of the longest install_after chain from name."""
+        if name in seen:
+            raise ValueError(
+                'Cyclic "install_after" config detected: ' + " -> ".join(seen + (name,))
+            )
+        if name not in depth:
+            depth[name] = max(
+                (1 + chain_depth(n, seen + (name,)) for n in after.get(name, [])),
+                default=0,
+            )
+        return depth[name]
+
+    # Therapist's memory layout (extract_to is False) is handled in build.py
+    queue = [c for c in component.ALL.values() if c.extract_to is not False]
+    names = {c.name for c in queue}
+    futures, running, downloading, ready = {}, {}, {}, []
+
+    def schedule(comp):
+        """Queue comp for extraction once its file has been downloaded."""
+        dl = component.DOWNLOADS.get(comp.name)
+        if dl is not None and not dl.done():
+            downloading[dl] = comp
+        elif dl is not None and dl.exception() is not None:
+            finish(comp, dl)
+        else:
+            # Extract priority by pointer-chase depth, filesize in ties
+            key = (-chain_depth(comp.name), -os.path.getsize(comp.path))
+            heapq.heappush(ready, (*key, comp))
+
+    def finish(comp, fut):
+        """Record the result for comp, and schedule the jobs waiting on it."""
+        futures[comp.name] = fut
+        for child in children.pop(comp.name, []):
+            schedule(child)
+
+    # Each job becomes ready to start when the job it is installed after is done
+    children = collections.defaultdict(list)
+    for comp in queue:
+        # Check every comp up front; members of a cycle are never scheduled
+        chain_depth(comp.name)
+        if comp.install_after in names:
+            children[comp.install_after].append(comp)
+    with concurrent.futures.ThreadPoolExecutor(JOBS) as pool:
+        for comp in queue:
+            if comp.install_after not in names:
+                schedule(comp)
+        while ready or running or downloading:
+            while ready and len(running) < JOBS:
+                comp = heapq.heappop(ready)[-1]
+                running[extract_comp(pool, comp)] = comp
+            done, _ = concurrent.futures.wait(
+                [*running, *downloading],
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for fut in done:
+                if fut in downloading:
+                    schedule(downloading.pop(fut))
                 else:
-                    break  # if there was nothing eligible to extract, sleep
-            time.sleep(0.01)
+                    finish(running.pop(fut), fut)
+    # Don't leave any downloads running into the build stage
+    concurrent.futures.wait(component.DOWNLOADS.values())
     failed = [k for k, v in futures.items() if v.exception() is not None]
     for key in failed:
         comp = component.ALL.pop(key, None)
@@ -219,8 +566,10 @@ def extract_everything():
 def add_lnp_dirs():
     """Install the LNP subdirs that I can't create automatically."""
     # Should use https://github.com/Lazy-Newb-Pack/LNP-shared-core someday...
-    for d in ("colors", "embarks", "extras", "keybinds", "tilesets"):
-        copy_tree(paths.base(d), paths.lnp(d))
+    # Copied, not linked, as the build edits some of these files in place
+    dirs = ("colors", "embarks", "extras", "keybinds", "tilesets")
+    with concurrent.futures.ThreadPoolExecutor(len(dirs)) as pool:
+        list(pool.map(lambda d: copy_tree(paths.base(d), paths.lnp(d)), dirs))
 
 
 def main():
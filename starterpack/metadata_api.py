@@ -1,23 +1,42 @@
 """Classes for interaction with web APIs for component metadata."""
+
 # pylint:disable=missing-docstring
 
 import datetime
+import functools
+import json
 import os
+import re
 import time
 
 import requests
 import yaml
+from urllib3.util.retry import Retry
 
 from . import paths
 
+# Reuse connections (and TLS sessions) across requests to the same host.
+# Enough pooled connections for the metadata and download threads, as
+# urllib3 warns each time it has to discard one.  Retry transient failures
+# rather than dropping the component from this build.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "PeridexisErrant-starter-pack"
+_ADAPTER = requests.adapters.HTTPAdapter(
+    pool_maxsize=64,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+)
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+
 
 def get_ok(*args, **kwargs):
-    """Run `requests.get` plus `raise_for_status`."""
-    r = requests.get(*args, **kwargs)
+    """Run `requests.get` plus `raise_for_status`, on a shared session."""
+    r = SESSION.get(*args, **kwargs)
     r.raise_for_status()
     return r
 
 
+@functools.lru_cache(maxsize=None)
 def get_auth():
     """Return user auth to increase GitHub API rate limit."""
     if os.path.isfile("_CRED"):
@@ -27,6 +46,8 @@ def get_auth():
 
 
 SAVED = {}
+# Keys refreshed since the cache was loaded; if none, there's nothing to dump
+DIRTY = set()
 
 
 def cache(method=lambda *_: None, *, dump=False):
@@ -34,79 +55,94 @@ def cache(method=lambda *_: None, *, dump=False):
 
     Reads cache from local file if cache is empty.
     Keeps record of when items were last refreshed, and expires at interval.
-    Supports conditional requests for GitHub.
+    Supports conditional requests, for classes with `conditional` set.
     """
     if not SAVED:
         try:
-            with open("_cached.yml") as f:
-                SAVED.update(yaml.load(f, Loader=yaml.Loader))
+            with open("_cached.json") as f:
+                SAVED.update(json.load(f))
         except OSError:
             print("Downloading metadata for components...\n")
             SAVED.update({"metadata": {}, "timestamps": {}})
-    elif dump:
-        with open("_cached.yml", "w") as f:
-            yaml.dump(SAVED, f, indent=4)
+    elif dump and DIRTY:
+        with open("_cached.json", "w") as f:
+            json.dump(SAVED, f, indent=4)
+        DIRTY.clear()
 
     def wrapper(self, ident):
-        key, args = ident, (self, ident)
-        if isinstance(self, GitHubAssetMetadata):
-            key = (not paths.ARGS.stable, ident)
-            args = (
-                self,
-                ident,
-                SAVED["timestamps"].get(key, 0),
-                SAVED["metadata"].get(ident),
-            )
-        if (time.time() - SAVED["timestamps"].get(key, 0)) > 30 * 60:
+        metadata, timestamps = SAVED["metadata"], SAVED["timestamps"]
+        key, args = self.cache_key(ident), (self, ident)
+        if self.conditional:
+            args += (timestamps.get(key, 0), metadata.get(key))
+        if (time.time() - timestamps.get(key, 0)) > 30 * 60:
             new_json = method(*args)
             if new_json is not None:
-                SAVED["metadata"][key] = new_json
-                SAVED["timestamps"][key] = time.time()
-        return SAVED["metadata"].get(key)
+                metadata[key] = new_json
+                timestamps[key] = time.time()
+                DIRTY.add(key)
+        return metadata.get(key)
 
     return wrapper
 
 
+# Day resolution, so one value serves the whole run
+TODAY = datetime.datetime.today()
+
+
 def days_ago(func):
     """Implement date-subtraction boilerplate as a decorator."""
 
     def _inner(*args):
-        return (datetime.datetime.today() - func(*args)).days
+        return (TODAY - func(*args)).days
 
     return _inner
 
 
-def best_asset(fname_list, break_ties_by_type=True):
-    """Return a dict of the best asset from the list for each OS."""
+# No token can overlap another, so one scan finds every substring match
+ASSET_TAGS = re.compile(
+    r"(?P<win>win)|(?P<osx>osx|mac)|(?P<linux>linux)|(?P<_32>32)|(?P<_64>64)"
+)
 
-    def fname(a):
-        return os.path.basename(a).lower()
 
+def best_asset(fname_list, break_ties_by_type=True):
+    """Return a dict of the best asset from the list for each OS."""
+    tags = [
+        {m.lastgroup for m in ASSET_TAGS.finditer(os.path.basename(a).lower())}
+        for a in fname_list
+    ]
     asst = {}
     for bits in ("32", "64"):
-        wrong_bits = ["32", "64"][bits == "32"]
+        want, avoid = ("_32", "_64") if bits == "32" else ("_64", "_32")
         for k in ("win", "osx", "linux"):
-            typed = []
-            if break_ties_by_type:
+            # First asset for this OS with these bits, else without the wrong
+            # bits, else any for this OS
+            best, best_score = None, 0
+            for a, tag in zip(fname_list, tags):
+                if k in tag:
+                    score = 3 if want in tag else 2 if avoid not in tag else 1
+                    if score > best_score:
+                        best, best_score = a, score
+            if best is None and break_ties_by_type:
                 ftype = {"win": ".exe", "osx": ".dmg", "linux": ".sh"}[k]
-                typed = [a for a in fname_list if a.endswith(ftype)] + [
-                    a for a in fname_list if a.endswith(".jar")
-                ]
-            os_files = [
-                a
-                for a in fname_list
-                if k in fname(a) or (k == "osx" and "mac" in fname(a))
-            ]
-            un_bitted = [a for a in os_files if wrong_bits not in fname(a)]
-            bitted = [a for a in os_files if bits in fname(a)]
-            lst = bitted or un_bitted or os_files or typed or fname_list
-            asst[(k, bits)] = lst[0] if lst else None
+                best = next((a for a in fname_list if a.endswith(ftype)), None)
+                if best is None:
+                    best = next((a for a in fname_list if a.endswith(".jar")), None)
+            if best is None and fname_list:
+                best = fname_list[0]
+            asst[k + bits] = best
     return asst
 
 
 class AbstractMetadata:
     """Base class for site-specific downloaders."""
 
+    # If true, cached json() also gets the last timestamp and payload
+    conditional = False
+
+    def cache_key(self, identifier):
+        # JSON object keys are strings, e.g. for DFFD's integer ids
+        return str(identifier)
+
     def json(self, identifier):
         raise NotImplementedError()
 
@@ -142,6 +178,11 @@ class DFFDMetadata(AbstractMetadata):
 
 
 class GitHubAssetMetadata(AbstractMetadata):
+    conditional = True
+
+    def cache_key(self, repo):
+        return ("stable:" if paths.ARGS.stable else "unstable:") + repo
+
     # pylint:disable=arguments-differ
     @cache
     def json(self, repo, last_timestamp=None, last_json=None):
@@ -150,15 +191,16 @@ class GitHubAssetMetadata(AbstractMetadata):
         use_list = not paths.ARGS.stable
         if paths.ARGS.stable:
             url += "/latest"
-        header = {
-            "If-Modified-Since": datetime.datetime.fromtimestamp(
+        header = {}
+        if last_json is not None:
+            # Unchanged responses are 304s, which don't count against rate limit
+            header["If-Modified-Since"] = datetime.datetime.fromtimestamp(
                 last_timestamp, datetime.timezone.utc
             ).strftime("%a, %d %b %Y %H:%M:%S GMT")
-        }
+            if last_json.get("etag"):
+                header["If-None-Match"] = last_json["etag"]
         try:
-            req = get_ok(
-                url, auth=get_auth(), headers={} if last_json is None else header
-            )
+            req = get_ok(url, auth=get_auth(), headers=header)
         except requests.exceptions.HTTPError:
             # Raises 404 on repos with no stable releases, e.g. Thurin's TwbT builds
             if paths.ARGS.stable:
@@ -182,15 +224,16 @@ class GitHubAssetMetadata(AbstractMetadata):
             "published_at": resp["published_at"],
             "assets": best_asset(assets),
             "zipball_url": resp["zipball_url"],
+            "etag": req.headers.get("ETag"),
         }
 
     def dl_link(self, repo):
-        return self.json(repo)["assets"][(paths.HOST_OS, paths.BITS)]
+        return self.json(repo)["assets"][paths.HOST_KEY]
 
     @days_ago
     def days_since_update(self, repo):
-        return datetime.datetime.strptime(
-            self.json(repo)["published_at"], "%Y-%m-%dT%H:%M:%SZ"
+        return datetime.datetime.fromisoformat(
+            self.json(repo)["published_at"].rstrip("Z")
         )
 
 
@@ -231,25 +274,30 @@ class BitbucketMetadata(AbstractMetadata):
 
     @days_ago
     def days_since_update(self, repo):
-        return datetime.datetime.strptime(
-            self.json(repo)["times"][(paths.HOST_OS, paths.BITS)].split(".")[0],
-            "%Y-%m-%dT%H:%M:%S",
+        return datetime.datetime.fromisoformat(
+            self.json(repo)["times"][paths.HOST_KEY].split(".")[0]
         )
 
 
 class ManualMetadata(AbstractMetadata):
-    def json(self, identifier):
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def components():
+        """Return the config for each component, across all categories."""
         with open("components.yml") as f:
-            for category in yaml.safe_load(f).values():
-                if identifier in category:
-                    cfg = category[identifier]
-                    cfg.update(cfg.pop(paths.BITS + "bit", {}))
-                    return cfg
-        raise ValueError(identifier)
+            categories = yaml.load(f, Loader=paths.SAFE_LOADER)
+        return {k: v for cat in categories.values() for k, v in cat.items()}
+
+    def json(self, identifier):
+        if identifier not in self.components():
+            raise ValueError(identifier)
+        cfg = dict(self.components()[identifier])
+        cfg.update(cfg.pop(paths.BITS + "bit", {}))
+        return cfg
 
     @days_ago
     def days_since_update(self, id_):
-        return datetime.datetime.strptime(self.json(id_)["updated"], "%Y-%m-%d")
+        return datetime.datetime.fromisoformat(self.json(id_)["updated"])
 
 
 def df_dl_from_ver(ver):
@@ -267,9 +315,13 @@ class DFMetadata(AbstractMetadata):
     @cache
     def json(self, df):
         url = "http://bay12games.com/dwarves/dev_release.rss"
-        for line in get_ok(url).text.split("\n"):
-            if "<title>" in line and df not in line:
-                return line[13:35].split(": DF ")
+        # Stop reading at the first matching line.  Closing early drops the
+        # connection instead of reusing it, but beats reading the whole feed.
+        with get_ok(url, stream=True) as resp:
+            resp.encoding = "utf-8"
+            for line in resp.iter_lines(decode_unicode=True):
+                if "<title>" in line and df not in line:
+                    return line[13:35].split(": DF ")
 
     def dl_link(self, df):
         return df_dl_from_ver(self.version(df))
@@ -279,7 +331,7 @@ class DFMetadata(AbstractMetadata):
 
     @days_ago
     def days_since_update(self, df):
-        return datetime.datetime.strptime(self.json(df)[0], "%Y-%m-%d")
+        return datetime.datetime.fromisoformat(self.json(df)[0])
 
 
 METADATA_TYPES = {
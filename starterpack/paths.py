@@ -2,6 +2,7 @@
 # pylint:disable=missing-docstring,cyclic-import
 
 import argparse
+import functools
 import os
 import sys
 from contextlib import suppress
@@ -12,25 +13,44 @@ native_os = {"linux": "linux", "win32": "win", "cygwin": "win", "darwin": "osx"}
     sys.platform
 ]
 
+# libyaml is many times faster, where available
+SAFE_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 CONFIG = {}
 with suppress(IOError):
     with open("config.yml") as ymlf:
-        CONFIG = yaml.safe_load(ymlf)
-
-parser = argparse.ArgumentParser()
-parser.add_argument("--os", choices=["win", "linux", "osx"], default=native_os)
-parser.add_argument("--bits", choices=["32", "64"], default="64")
-parser.add_argument("--stable", dest="stable", action="store_true")
-parser.add_argument("--unstable", dest="stable", action="store_false")
-parser.set_defaults(stable=True)
-ARGS = parser.parse_args()
-
-BITS = ARGS.bits
-assert BITS in ("32", "64")
-
-HOST_OS = ARGS.os
-
-
+        CONFIG = yaml.load(ymlf, Loader=SAFE_LOADER)
+
+
+@functools.lru_cache(maxsize=1)
+def _args():
+    """Parse the command line, on first use rather than at import."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--os", choices=["win", "linux", "osx"], default=native_os)
+    parser.add_argument("--bits", choices=["32", "64"], default="64")
+    parser.add_argument("--stable", dest="stable", action="store_true")
+    parser.add_argument("--unstable", dest="stable", action="store_false")
+    parser.add_argument("--zip-level", type=int, choices=range(10), default=6)
+    parser.set_defaults(stable=True)
+    return parser.parse_args()
+
+
+def __getattr__(name):
+    """Set the command-line dependent constants on first use.
+
+    ARGS, BITS, HOST_OS, and HOST_KEY (this platform's key in per-platform
+    asset dicts, e.g. "win64") then become plain module attributes.
+    """
+    if name not in ("ARGS", "BITS", "HOST_OS", "HOST_KEY"):
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    args = _args()
+    globals().update(
+        ARGS=args, BITS=args.bits, HOST_OS=args.os, HOST_KEY=args.os + args.bits
+    )
+    return globals()[name]
+
+
+@functools.lru_cache(maxsize=None)
 def df_ver(as_string=True):
     """Return the current version string of Dwarf Fortress."""
     from . import component
@@ -39,20 +59,27 @@ def df_ver(as_string=True):
     return ver if as_string else tuple(ver.split(".")[1:])
 
 
-def pack_ver(*, warn=True):
-    """Return the current version string of the created pack."""
+@functools.lru_cache(maxsize=1)
+def _changelog_version():
+    """Return the newest version in the changelog, checking it's unique."""
     with open("base/changelog.txt") as f:
         ver = f.readline().strip()
-        if warn and not ver.startswith(df_ver()):
-            print("ERROR:  pack version must start with DF version.")
         for _ in range(100):
             assert not f.readline().startswith(ver), ver + " in changelog twice"
     return ver
 
 
+def pack_ver(*, warn=True):
+    """Return the current version string of the created pack."""
+    ver = _changelog_version()
+    if warn and not ver.startswith(df_ver()):
+        print("ERROR:  pack version must start with DF version.")
+    return ver
+
+
 def build(*paths):
     """Return the path to the main pack directory ('build')."""
-    return os.path.join("build", *paths)
+    return os.sep.join(("build",) + paths)
 
 
 def df(*paths):
@@ -81,28 +108,29 @@ def graphics(*paths):
 
 
 def curr_baseline(*paths):
-    dname = "df_{0[1]}_{0[2]}".format(df_ver().split("."))
+    dname = "df_{}_{}".format(*df_ver(as_string=False))
     return lnp("baselines", dname, *paths)
 
 
 def dist(*paths):
     """Return the path to the distribution dir."""
-    return os.path.join("dist", *paths)
+    return os.sep.join(("dist",) + paths)
 
 
+@functools.lru_cache(maxsize=None)
 def zipped():
     """Return the path to the zipped pack to upload."""
     name = CONFIG.get("packname") or "Unknown Pack {}"
-    if native_os != HOST_OS:
-        name += "-" + HOST_OS
+    if native_os != _args().os:
+        name += "-" + _args().os
     return dist(name.format(pack_ver(warn=False)) + ".zip")
 
 
 def base(*paths):
     """Return the path to the persistent content directory."""
-    return os.path.join("base", *paths)
+    return os.sep.join(("base",) + paths)
 
 
 def components(*paths):
     """Return the path to the downloaded components cache dir."""
-    return os.path.join("components", *paths)
+    return os.sep.join(("components",) + paths)
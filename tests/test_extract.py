@@ -0,0 +1,41 @@
+"""Tests for the archive extraction helpers."""
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+# The real component module downloads metadata when imported
+sys.modules.setdefault(
+    "starterpack.component", types.ModuleType("starterpack.component")
+)
+
+from starterpack import extract  # noqa: E402
+
+
+@unittest.skipUnless(hasattr(os, "symlink"), "needs symlink support")
+class CopyTreeTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = os.path.join(tmp.name, "src")
+        self.dest = os.path.join(tmp.name, "dest")
+        for root in (self.src, self.dest):
+            os.makedirs(os.path.join(root, "lib"))
+        with open(os.path.join(self.src, "lib", "real.so"), "w") as f:
+            f.write("new")
+        os.symlink("real.so", os.path.join(self.src, "lib", "link.so"))
+        with open(os.path.join(self.dest, "lib", "link.so"), "w") as f:
+            f.write("old")
+
+    def test_link_merge_overwrites_existing_file_with_symlink_target(self):
+        extract.copy_tree(self.src, self.dest, link=True)
+        with open(os.path.join(self.dest, "lib", "link.so")) as f:
+            self.assertEqual(f.read(), "new")
+        with open(os.path.join(self.dest, "lib", "real.so")) as f:
+            self.assertEqual(f.read(), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()